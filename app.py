@@ -1,7 +1,12 @@
 import os
 import sys
+import hashlib
+import queue
+import shutil
 import subprocess
 import tempfile
+import threading
+import time
 from pathlib import Path
 
 import streamlit as st
@@ -14,6 +19,11 @@ CLI_SCRIPT = BASE_DIR / "final2cli.py"
 # NEW: directory to auto-scan fonts from
 FONT_DIR = BASE_DIR / "fonts"
 
+# Finished videos, keyed by a hash of every input (see compute_cache_key)
+VIDEO_CACHE_DIR = BASE_DIR / ".video_cache"
+# Oldest videos are dropped once the cache grows past this
+VIDEO_CACHE_MAX_BYTES = 2 * 1024**3
+
 VOICE_OPTIONS = {
     "Hindi (hi-IN-SwaraNeural)": "hi-IN-SwaraNeural",
     "Telugu (te-IN-ShrutiNeural)": "te-IN-ShrutiNeural",
@@ -42,6 +52,10 @@ LOGO_POSITIONS = ["top-center", "top-left", "top-right", "bottom-center", "botto
 TEXT_POSITIONS = ["center", "top", "bottom"]
 STYLE_PRESETS = ["default", "caption", "subtitle"]
 
+# Redraw the log box at most this often while the CLI is running
+LOG_FLUSH_SECONDS = 0.15
+LOG_FLUSH_LINES = 20
+
 # ---------- PAGE SETUP ----------
 
 st.set_page_config(
@@ -91,6 +105,66 @@ def save_uploaded_file(uploaded_file, dest_path: Path):
     return str(dest_path)
 
 
+@st.cache_data(max_entries=4)
+def load_video_bytes(path: str, mtime: float) -> bytes:
+    """Read a finished video once; mtime in the key invalidates rewritten files."""
+    return Path(path).read_bytes()
+
+
+def iter_lines_with_idle(stream, idle_seconds: float):
+    """Yield lines from stream, plus None each time it stays silent for idle_seconds."""
+    lines = queue.Queue()
+
+    def pump():
+        for line in stream:
+            lines.put(line)
+        lines.put("")  # EOF; real lines always end in "\n"
+
+    threading.Thread(target=pump, daemon=True).start()
+    while True:
+        try:
+            line = lines.get(timeout=idle_seconds)
+        except queue.Empty:
+            yield None
+            continue
+        if not line:
+            return
+        yield line
+
+
+def compute_cache_key(input_paths: list[str | None], options: dict, flags: list[str]) -> str:
+    """SHA256 over the renderer, the input files' contents, and every CLI option and flag."""
+    h = hashlib.sha256()
+    # Any change to the CLI invalidates videos it rendered before
+    h.update(CLI_SCRIPT.read_bytes())
+    for path in input_paths:
+        data = Path(path).read_bytes() if path else b""
+        # Length prefix so (a, bc) and (ab, c) don't collide
+        h.update(len(data).to_bytes(8, "little"))
+        h.update(data)
+    h.update(repr(sorted(options.items())).encode("utf-8"))
+    h.update(repr(sorted(flags)).encode("utf-8"))
+    return h.hexdigest()
+
+
+def prune_video_cache(max_bytes: int = VIDEO_CACHE_MAX_BYTES):
+    """Delete the oldest cached videos until the rest fit in max_bytes."""
+    entries = []
+    for path in VIDEO_CACHE_DIR.glob("*.mp4"):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue  # removed by another session
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    # Newest first; the newest one (just written) is always kept
+    total = 0
+    for i, (_, size, path) in enumerate(sorted(entries, reverse=True)):
+        total += size
+        if i and total > max_bytes:
+            path.unlink(missing_ok=True)
+
+
 def build_cli_command(
     workdir: Path,
     review_path: str,
@@ -124,16 +198,21 @@ def build_cli_command(
 
 # ---------- DISCOVER SERVER FONTS (NEW) ----------
 
-server_font_names: list[str] = []
-server_font_map: dict[str, str] = {}
+@st.cache_data(ttl=300)
+def discover_server_fonts(font_dir: str):
+    """Scan the fonts folder once (refreshed every 5 min) instead of on every rerun."""
+    names: list[str] = []
+    font_map: dict[str, str] = {}
+
+    p = Path(font_dir)
+    if p.exists() and p.is_dir():
+        for f in sorted(p.glob("*.ttf")) + sorted(p.glob("*.otf")):
+            names.append(f.name)
+            font_map[f.name] = str(f)
+    return names, font_map
 
-if FONT_DIR.exists() and FONT_DIR.is_dir():
-    for p in sorted(FONT_DIR.glob("*.ttf")):
-        server_font_names.append(p.name)
-        server_font_map[p.name] = str(p)
-    for p in sorted(FONT_DIR.glob("*.otf")):
-        server_font_names.append(p.name)
-        server_font_map[p.name] = str(p)
+
+server_font_names, server_font_map = discover_server_fonts(str(FONT_DIR))
 
 
 # ---------- LAYOUT ----------
@@ -304,40 +383,82 @@ if generate_btn:
                 flags=flags,
             )
 
-            # Run CLI and stream logs
-            log_lines = []
-            try:
-                proc = subprocess.Popen(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    text=True,
-                    cwd=str(BASE_DIR),
-                )
-
-                for line in proc.stdout:
-                    log_lines.append(line.rstrip("\n"))
-                    log_placeholder.code("\n".join(log_lines), language="bash")
-
-                proc.wait()
-                exit_code = proc.returncode
+            cache_key = compute_cache_key(
+                [review_path, font_path, bg_path, music_path, logo_path], options, flags
+            )
+            cached_video = VIDEO_CACHE_DIR / f"{cache_key}.mp4"
 
-                if exit_code == 0 and os.path.exists(output_path):
-                    log_lines.append("✅ Video generation completed successfully.")
-                    log_placeholder.code("\n".join(log_lines), language="bash")
+            log_lines = []
+            if cached_video.exists():
+                # Identical inputs were rendered before: skip the whole pipeline
+                log_lines.append("♻️ Same inputs as a previous run – reusing the cached video.")
+                log_placeholder.code("\n".join(log_lines), language="bash")
 
-                    with open(output_path, "rb") as f:
-                        video_bytes = f.read()
-                    download_placeholder.download_button(
-                        label="⬇️ Download Video",
-                        data=video_bytes,
-                        file_name=os.path.basename(output_path),
-                        mime="video/mp4",
+                download_placeholder.download_button(
+                    label="⬇️ Download Video",
+                    data=load_video_bytes(str(cached_video), cached_video.stat().st_mtime),
+                    file_name=os.path.basename(output_path),
+                    mime="video/mp4",
+                )
+            else:
+                # Run CLI and stream logs
+                try:
+                    proc = subprocess.Popen(
+                        cmd,
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.STDOUT,
+                        text=True,
+                        cwd=str(BASE_DIR),
                     )
-                else:
-                    log_lines.append(f"❌ Video generation failed (exit code {exit_code}).")
-                    log_placeholder.code("\n".join(log_lines), language="bash")
 
-            except Exception as e:
-                log_lines.append(f"❌ Error: {e}")
-                log_placeholder.code("\n".join(log_lines), language="bash")
+                    # Batch redraws: each .code() call re-sends the whole log to the browser.
+                    # A None means the CLI went quiet (e.g. during the final encode), so
+                    # whatever is still pending gets drawn instead of waiting for more output.
+                    pending = 0
+                    last_flush = time.monotonic()
+                    for line in iter_lines_with_idle(proc.stdout, LOG_FLUSH_SECONDS):
+                        if line is not None:
+                            log_lines.append(line.rstrip("\n"))
+                            pending += 1
+                        now = time.monotonic()
+                        if pending and (
+                            line is None
+                            or pending >= LOG_FLUSH_LINES
+                            or now - last_flush >= LOG_FLUSH_SECONDS
+                        ):
+                            log_placeholder.code("\n".join(log_lines), language="bash")
+                            pending = 0
+                            last_flush = now
+
+                    proc.wait()
+                    exit_code = proc.returncode
+
+                    if exit_code == 0 and os.path.exists(output_path):
+                        log_lines.append("✅ Video generation completed successfully.")
+                        log_placeholder.code("\n".join(log_lines), language="bash")
+
+                        # Copy then rename so a half-written file is never served as a hit.
+                        # Sessions share one process (and PID), so each needs its own temp file.
+                        VIDEO_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+                        with tempfile.NamedTemporaryFile(
+                            dir=VIDEO_CACHE_DIR, suffix=".tmp", delete=False
+                        ) as tmp_file, open(output_path, "rb") as src:
+                            shutil.copyfileobj(src, tmp_file)
+                        os.replace(tmp_file.name, cached_video)
+                        prune_video_cache()
+
+                        # Read via the stable cache path so a rerun with the same inputs hits
+                        video_bytes = load_video_bytes(str(cached_video), cached_video.stat().st_mtime)
+                        download_placeholder.download_button(
+                            label="⬇️ Download Video",
+                            data=video_bytes,
+                            file_name=os.path.basename(output_path),
+                            mime="video/mp4",
+                        )
+                    else:
+                        log_lines.append(f"❌ Video generation failed (exit code {exit_code}).")
+                        log_placeholder.code("\n".join(log_lines), language="bash")
+
+                except Exception as e:
+                    log_lines.append(f"❌ Error: {e}")
+                    log_placeholder.code("\n".join(log_lines), language="bash")
@@ -1,20 +1,39 @@
 import os
+import re
+import mmap
 import random
 import asyncio
 import argparse
-from moviepy.editor import *
-from moviepy.audio.fx.audio_loop import audio_loop
+import shutil
+import subprocess
+import tempfile
+import wave
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
 from PIL import Image, ImageDraw, ImageFont, ImageColor
+from PIL import __version__ as PIL_VERSION
+import numpy as np
+import imageio_ffmpeg
+import aiohttp
 import edge_tts
 import uharfbuzz as hb
 import freetype
 import textwrap
 from tqdm import tqdm
 
+# Optional: libjpeg-turbo bindings for faster frame encoding (falls back to Pillow)
+try:
+    from turbojpeg import TurboJPEG, TJPF_RGB, TJSAMP_444
+    _turbojpeg = TurboJPEG()
+except (ImportError, OSError, RuntimeError):
+    _turbojpeg = None
+
 # Fix for PIL compatibility
 if not hasattr(Image, 'ANTIALIAS'):
     Image.ANTIALIAS = Image.Resampling.LANCZOS
 
+FFMPEG_BINARY = os.environ.get("FFMPEG_BINARY") or imageio_ffmpeg.get_ffmpeg_exe()
+
 
 def parse_args():
     parser = argparse.ArgumentParser(description="Indian Language Review Video Generator")
@@ -84,25 +103,290 @@ def parse_args():
     return parser.parse_args()
 
 
-async def generate_tts(text, out_path, voice, rate):
-    communicate = edge_tts.Communicate(text, voice=voice, rate=rate)
-    await communicate.save(out_path)
+class _SharedTTSConnector(aiohttp.TCPConnector):
+    """TCPConnector shared by every chunk of a batch.
+
+    edge_tts wraps each request in its own ClientSession, which owns (and
+    closes) the connector passed to it. Ignoring that close keeps the DNS
+    cache and connector state alive across chunks; shutdown() really closes it.
+    """
+
+    async def close(self, **kwargs):
+        pass
+
+    async def shutdown(self):
+        await super().close()
+
+
+# Network-side failures worth retrying; anything else (e.g. a bad rate) fails at once
+_TTS_TRANSIENT_ERRORS = (
+    aiohttp.ClientError,
+    asyncio.TimeoutError,
+    edge_tts.exceptions.WebSocketError,
+    edge_tts.exceptions.NoAudioReceived,
+)
 
 
-async def generate_all_audios(chunks, voice, rate, out_dir):
+async def generate_tts(text, out_path, voice, rate, retries=3, connector=None):
+    """Synthesize one chunk, retrying transient failures with exponential backoff."""
+    # Invalid voice/rate raise ValueError here, before any retry or backoff
+    communicate = edge_tts.Communicate(text, voice=voice, rate=rate, connector=connector)
+    for attempt in range(retries + 1):
+        try:
+            await communicate.save(out_path)
+            return
+        except _TTS_TRANSIENT_ERRORS as e:
+            if attempt == retries:
+                raise
+            delay = 2 ** attempt
+            print(f"[WARN] TTS failed for {os.path.basename(out_path)} ({e}), retrying in {delay}s")
+            await asyncio.sleep(delay)
+            # A Communicate can only be streamed once
+            communicate = edge_tts.Communicate(text, voice=voice, rate=rate, connector=connector)
+
+
+async def _mp3_to_wav(src, dst):
+    """Decode one narration mp3 to 44.1 kHz stereo PCM, the format the final mux consumes."""
+    proc = await asyncio.create_subprocess_exec(
+        FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", "-y",
+        "-i", src, "-ar", "44100", "-ac", "2", dst,
+    )
+    if await proc.wait() != 0:
+        raise subprocess.CalledProcessError(proc.returncode, [FFMPEG_BINARY, "-i", src, dst])
+
+
+async def generate_all_audios(chunks, voice, rate, out_dir, concurrency=8):
     os.makedirs(out_dir, exist_ok=True)
-    tasks = []
-    for i, text in enumerate(tqdm(chunks, desc="Generating Audio")):
-        out_path = os.path.join(out_dir, f"chunk_{i}.mp3")
-        tasks.append(generate_tts(text, out_path, voice, rate))
-    await asyncio.gather(*tasks)
+    # Cap open WebSocket connections to the TTS service
+    sem = asyncio.Semaphore(concurrency)
+    connector = _SharedTTSConnector(limit=0, ttl_dns_cache=300)
+
+    async def _bounded(text, out_path):
+        async with sem:
+            await generate_tts(text, out_path, voice, rate, connector=connector)
+            # Decode now, overlapping other chunks' network waits; assembly only concatenates PCM
+            await _mp3_to_wav(out_path, os.path.splitext(out_path)[0] + ".wav")
+
+    tasks = [
+        _bounded(text, os.path.join(out_dir, f"chunk_{i}.mp3"))
+        for i, text in enumerate(chunks)
+    ]
+    try:
+        for fut in tqdm(asyncio.as_completed(tasks), total=len(tasks), desc="Generating Audio"):
+            await fut
+    finally:
+        await connector.shutdown()
+
+
+@lru_cache(maxsize=4)
+def _load_font_objects(font_path, font_size):
+    """Parse the font once per process and return (face, hb_font, upem)."""
+    face = freetype.Face(font_path)
+    face.set_char_size(font_size * 64)
+    with open(font_path, "rb") as f:
+        font_bytes = f.read()
+    hb_face = hb.Face(font_bytes)
+    hb_font = hb.Font(hb_face)
+    hb.ot_font_set_funcs(hb_font)
+    upem = hb_face.upem
+    hb_font.scale = (upem, upem)
+    return face, hb_font, upem
+
+
+@lru_cache(maxsize=4)
+def _load_pil_font(font_path, font_size):
+    try:
+        return ImageFont.truetype(font_path, font_size)
+    except:
+        return ImageFont.load_default()
+
+
+@lru_cache(maxsize=32)
+def _getrgb(color):
+    return ImageColor.getrgb(color)
+
+
+# Rasterized glyphs, keyed by (id(face), gid, font_size) -> (coverage array or None, top, left)
+_glyph_cache = {}
+
+
+def _get_glyph(face, gid, font_size):
+    """Rasterize a glyph once; empty bitmaps (e.g. spaces) come back as None."""
+    key = (id(face), gid, font_size)
+    cached = _glyph_cache.get(key)
+    if cached is None:
+        face.load_glyph(gid, freetype.FT_LOAD_RENDER | freetype.FT_LOAD_NO_HINTING)
+        bmp = face.glyph.bitmap
+        gray = None
+        if bmp.width and bmp.rows:
+            gray = np.frombuffer(bytes(bmp.buffer), dtype=np.uint8)
+            gray = gray.reshape(bmp.rows, bmp.pitch)[:, : bmp.width]
+        cached = (gray, face.glyph.bitmap_top, face.glyph.bitmap_left)
+        _glyph_cache[key] = cached
+    return cached
+
+
+# Shaped advances in font units, keyed by (id(hb_font), text)
+_advance_cache = {}
+
+
+def _shaped_advance(hb_font, txt):
+    """Shape txt once per font and return its total x advance in font units."""
+    key = (id(hb_font), txt)
+    adv = _advance_cache.get(key)
+    if adv is None:
+        buf = hb.Buffer()
+        buf.add_str(txt)
+        buf.guess_segment_properties()
+        hb.shape(hb_font, buf)
+        adv = sum(pos.x_advance for pos in buf.glyph_positions)
+        _advance_cache[key] = adv
+    return adv
+
+
+def _blit_glyph(canvas, gray, rgb, x, y):
+    """Alpha-blend a glyph coverage bitmap in color rgb onto an RGBA canvas at (x, y)."""
+    h, w = canvas.shape[:2]
+    rows, cols = gray.shape
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + cols, w), min(y + rows, h)
+    if x0 >= x1 or y0 >= y1:
+        return
+
+    g = gray[y0 - y:y1 - y, x0 - x:x1 - x]
+    dst = canvas[y0:y1, x0:x1]
+    alpha = g[:, :, None] / 255.0
+    dst[..., :3] = (1.0 - alpha) * dst[..., :3] + alpha * rgb
+    dst[..., 3] = np.maximum(dst[..., 3], g)
+
+
+@lru_cache(maxsize=32)
+def _load_bg(bg_path, w, h):
+    """Decode and resize a background once per process; callers must not mutate it."""
+    return Image.open(bg_path).convert("RGBA").resize((w, h))
+
+
+def _load_background(bg_path, size):
+    if bg_path and os.path.exists(bg_path):
+        return _load_bg(bg_path, *size)
+    return Image.new("RGBA", size, (40, 40, 40, 255))
+
+
+def _composite_rgb(bg, overlay):
+    """Blend an RGBA overlay onto an opaque background in one pass, returning RGB uint8."""
+    base = bg[..., :3].astype(np.uint16)
+    a = overlay[..., 3:4].astype(np.uint16)
+    out = (base * (255 - a) + overlay[..., :3] * a + 127) // 255
+    return out.astype(np.uint8)
+
+
+def _blend_box(arr, box, rgb, alpha):
+    """Blend a solid translucent rectangle (inclusive corners) straight into an image array."""
+    x0, y0, x1, y1 = (int(v) for v in box)
+    region = arr[max(y0, 0):y1 + 1, max(x0, 0):x1 + 1, :3]
+    fill = np.array(rgb, dtype=np.uint16) * alpha
+    region[...] = (region.astype(np.uint16) * (255 - alpha) + fill + 127) // 255
+
+
+def _save_frame(rgb, out_path, quality=95):
+    """Encode a slide as JPEG; full-res chroma keeps colored text edges clean."""
+    if _turbojpeg is not None:
+        with open(out_path, "wb") as f:
+            f.write(
+                _turbojpeg.encode(
+                    rgb, quality=quality, pixel_format=TJPF_RGB, jpeg_subsample=TJSAMP_444
+                )
+            )
+    else:
+        Image.fromarray(rgb, "RGB").save(out_path, quality=quality, subsampling=0)
+
+
+def _init_worker(font_path, font_size):
+    """Process pool initializer: preload the font so chunks don't re-parse it.
+
+    Backgrounds are left to _load_bg's cache, so each worker only decodes the
+    ones its own chunks actually use.
+    """
+    if font_path and os.path.exists(font_path):
+        _load_font_objects(font_path, font_size)
+
+
+def _render_one(args):
+    """Unpack one work item for the process pool and render it."""
+    text, out_path, font_path, kwargs = args
+    if text is None:
+        render_background(out_path, kwargs["bg_path"], kwargs["size"])
+    else:
+        render_text_image(text, out_path, font_path, **kwargs)
+    return out_path
+
+
+# Indic blocks (Devanagari through Tibetan) that need harfbuzz shaping
+_COMPLEX_SCRIPT_RE = re.compile("[\u0900-\u0FFF]")
 
 
 def contains_complex_script(text):
-    for ch in text:
-        if '\u0900' <= ch <= '\u0FFF':
-            return True
-    return False
+    return _COMPLEX_SCRIPT_RE.search(text) is not None
+
+
+def _layout_simple_text(text, font, size, text_position):
+    """Wrap plain text and return (lines, line_h, first line y, box top, box bottom)."""
+    lines = textwrap.wrap(text, width=28)
+    if not lines:
+        lines = [text]
+
+    # getbbox()[3] is what the removed getsize()[1] returned
+    line_h = font.getbbox("A")[3]
+    total_h = len(lines) * (line_h + 10)
+
+    # Vertical anchor
+    if text_position == "top":
+        y = 60
+    elif text_position == "bottom":
+        y = max(size[1] - total_h - 60, 30)
+    else:  # center
+        y = max((size[1] - total_h) // 2, 30)
+
+    return lines, line_h, y, y - 20, y + total_h + 20
+
+
+def render_background(out_path, bg_path=None, size=(720, 1280)):
+    """Write a text-less slide; its text is drawn later by ffmpeg (see simple_text_overlay)."""
+    bg = np.asarray(_load_background(bg_path, size))
+    _save_frame(np.ascontiguousarray(bg[..., :3]), out_path)
+
+
+def simple_text_overlay(
+    text,
+    font_path,
+    size=(720, 1280),
+    font_size=60,
+    font_color="#FFFFFF",
+    box_color="#000000",
+    box_alpha=0.6,
+    text_position="center",
+    enable_shadow=False,
+    shadow_color="#000000",
+    shadow_offset_x=2,
+    shadow_offset_y=2,
+):
+    """Lay out a plain-text slide for ffmpeg's drawbox/drawtext, or None if the font won't load."""
+    font = _load_pil_font(font_path, font_size)
+    if not isinstance(font, ImageFont.FreeTypeFont):
+        return None
+
+    lines, line_h, y, box_top, box_bottom = _layout_simple_text(text, font, size, text_position)
+    return {
+        "font_path": font_path,
+        "font_size": font_size,
+        "font_rgb": _getrgb(font_color),
+        "box": (30, box_top, size[0] - 30, box_bottom),
+        "box_rgb": _getrgb(box_color),
+        "box_alpha": int(max(0.0, min(1.0, box_alpha)) * 255) / 255,
+        "lines": [(line, y + k * (line_h + 10)) for k, line in enumerate(lines)],
+        "ascent": font.getmetrics()[0],
+        "shadow": (_getrgb(shadow_color), shadow_offset_x, shadow_offset_y) if enable_shadow else None,
+    }
 
 
 def render_text_image(
@@ -122,29 +406,18 @@ def render_text_image(
     shadow_offset_y=2,
 ):
     """Draw text (complex or simple) onto an image with optional bg, box, and shadow."""
-    if bg_path and os.path.exists(bg_path):
-        bg = Image.open(bg_path).convert("RGBA").resize(size)
-    else:
-        bg = Image.new("RGBA", size, (40, 40, 40, 255))
+    # Copy: the background is cached and shared, the box is blended into it in place
+    bg_arr = np.array(_load_background(bg_path, size))
 
-    overlay = Image.new("RGBA", size, (0, 0, 0, 0))
-    draw = ImageDraw.Draw(overlay)
-
-    box_rgba = (*ImageColor.getrgb(box_color), int(max(0.0, min(1.0, box_alpha)) * 255))
-    shadow_rgb = ImageColor.getrgb(shadow_color)
+    box_rgb = _getrgb(box_color)
+    box_a = int(max(0.0, min(1.0, box_alpha)) * 255)
+    shadow_rgb = _getrgb(shadow_color)
 
     if contains_complex_script(text):
         # --- Complex script path (your original logic) ---
-        face = freetype.Face(font_path)
-        with open(font_path, "rb") as f:
-            font_bytes = f.read()
-        hb_face = hb.Face(font_bytes)
-        hb_font = hb.Font(hb_face)
-        hb.ot_font_set_funcs(hb_font)
-        upem = hb_face.upem
-        hb_font.scale = (upem, upem)
+        face, hb_font, upem = _load_font_objects(font_path, font_size)
 
-        font_rgb = ImageColor.getrgb(font_color)
+        font_rgb = _getrgb(font_color)
 
         def shape_line(txt, size_px):
             buf = hb.Buffer()
@@ -156,19 +429,28 @@ def render_text_image(
 
         max_width = size[0] - 100
         line_spacing = 1.3
+        scale = font_size / upem
+        space_w = _shaped_advance(hb_font, " ") * scale
+
+        # Prefix sums of cached per-word advances (each plus a trailing space):
+        # the width of words[i:j] is cum[j] - cum[i] - space_w, so each line
+        # break is one searchsorted instead of a per-word Python loop
         words = text.split()
-        lines, current = [], ""
-        while words:
-            trial = current + " " + words[0] if current else words[0]
-            _, w = shape_line(trial, font_size)
-            if w <= max_width:
-                current = trial
-                words.pop(0)
-            else:
-                lines.append(current)
-                current = ""
-        if current:
-            lines.append(current)
+        widths = np.array([_shaped_advance(hb_font, w) for w in words], dtype=np.float64) * scale
+        cum = np.concatenate(([0.0], np.cumsum(widths + space_w)))
+
+        lines, start = [], 0
+        while start < len(words):
+            # Longest run that fits the limit with 5% slack; a lone overlong word still gets a line
+            limit = cum[start] + max_width * 1.05 + space_w
+            end = max(int(np.searchsorted(cum, limit, side="right")) - 1, start + 1)
+            # Near the limit, trust a real shape of the joined line over the sum
+            while end - start > 1 and cum[end] - cum[start] - space_w > max_width * 0.95:
+                if shape_line(" ".join(words[start:end]), font_size)[1] <= max_width:
+                    break
+                end -= 1
+            lines.append(" ".join(words[start:end]))
+            start = end
 
         # Total text height
         total_h = len(lines) * font_size * line_spacing + 40
@@ -182,70 +464,51 @@ def render_text_image(
 
         box_top = y - 20
         box_bottom = y + total_h
-        draw.rectangle([30, box_top, size[0] - 30, box_bottom], fill=box_rgba)
+        _blend_box(bg_arr, (30, box_top, size[0] - 30, box_bottom), box_rgb, box_a)
 
+        # Phase A: shape every line and record where each glyph lands
+        gids, origins = [], []
         for line in lines:
             buf, line_width = shape_line(line, font_size)
-            infos = buf.glyph_infos
-            positions = buf.glyph_positions
             x = (size[0] - line_width) / 2
-
-            for info, pos in zip(infos, positions):
-                gid = info.codepoint
-                face.set_char_size(font_size * 64)
-                face.load_glyph(gid, freetype.FT_LOAD_RENDER | freetype.FT_LOAD_NO_HINTING)
-                bmp = face.glyph.bitmap
-                top = face.glyph.bitmap_top
-                left = face.glyph.bitmap_left
-
-                glyph_img = Image.new("L", (bmp.width, bmp.rows), 0)
-                glyph_img.frombytes(bytes(bmp.buffer))
-
-                rgba = Image.new("RGBA", (bmp.width, bmp.rows), font_rgb + (0,))
-                rgba.putalpha(glyph_img)
-
-                pos_x = int(x + (pos.x_offset / upem) * font_size) + left
-                pos_y = int(y + (font_size - top) + (pos.y_offset / upem) * font_size)
-
-                if enable_shadow:
-                    shadow_rgba = Image.new("RGBA", (bmp.width, bmp.rows), shadow_rgb + (0,))
-                    shadow_rgba.putalpha(glyph_img)
-                    overlay.paste(
-                        shadow_rgba,
-                        (pos_x + shadow_offset_x, pos_y + shadow_offset_y),
-                        shadow_rgba,
-                    )
-
-                overlay.paste(rgba, (pos_x, pos_y), rgba)
-                x += (pos.x_advance / upem) * font_size
+            for info, pos in zip(buf.glyph_infos, buf.glyph_positions):
+                gids.append(info.codepoint)
+                origins.append((x + pos.x_offset * scale, y + font_size + pos.y_offset * scale))
+                x += pos.x_advance * scale
             y += font_size * line_spacing
+
+        # Phase B: rasterize each distinct glyph once
+        glyphs = {gid: _get_glyph(face, gid, font_size) for gid in set(gids)}
+
+        # Phase C: resolve integer placements, then blit shadows before text
+        placements = []
+        for gid, (gx, gy) in zip(gids, origins):
+            gray, top, left = glyphs[gid]
+            if gray is not None:
+                placements.append((gray, int(gx) + left, int(gy - top)))
+
+        # The box is already in the opaque background, so glyphs blend straight into it
+        canvas = bg_arr
+        if enable_shadow:
+            shadow_arr = np.array(shadow_rgb, dtype=np.float64)
+            for gray, px, py in placements:
+                _blit_glyph(canvas, gray, shadow_arr, px + shadow_offset_x, py + shadow_offset_y)
+        font_arr = np.array(font_rgb, dtype=np.float64)
+        for gray, px, py in placements:
+            _blit_glyph(canvas, gray, font_arr, px, py)
+
+        frame = np.ascontiguousarray(canvas[..., :3])
     else:
         # --- Simple script path ---
-        try:
-            font = ImageFont.truetype(font_path, font_size)
-        except:
-            font = ImageFont.load_default()
-        lines = textwrap.wrap(text, width=28)
-        if not lines:
-            lines = [text]
-
-        line_h = font.getsize("A")[1]
-        total_h = len(lines) * (line_h + 10)
-
-        # Vertical anchor
-        if text_position == "top":
-            y = 60
-        elif text_position == "bottom":
-            y = max(size[1] - total_h - 60, 30)
-        else:  # center
-            y = max((size[1] - total_h) // 2, 30)
+        font = _load_pil_font(font_path, font_size)
+        lines, line_h, y, box_top, box_bottom = _layout_simple_text(text, font, size, text_position)
+        _blend_box(bg_arr, (30, box_top, size[0] - 30, box_bottom), box_rgb, box_a)
 
-        box_top = y - 20
-        box_bottom = y + total_h + 20
-        draw.rectangle([30, box_top, size[0] - 30, box_bottom], fill=box_rgba)
+        overlay = Image.new("RGBA", size, (0, 0, 0, 0))
+        draw = ImageDraw.Draw(overlay)
 
         for line in lines:
-            w, _ = draw.textsize(line, font=font)
+            w = font.getbbox(line)[2]
             x = (size[0] - w) / 2
             if enable_shadow:
                 draw.text(
@@ -257,8 +520,9 @@ def render_text_image(
             draw.text((x, y), line, font=font, fill=font_color)
             y += line_h + 10
 
-    final = Image.alpha_composite(bg, overlay).convert("RGB")
-    final.save(out_path)
+        frame = _composite_rgb(bg_arr, np.asarray(overlay))
+
+    _save_frame(frame, out_path)
 
 
 def generate_images(
@@ -292,32 +556,183 @@ def generate_images(
         if not bg_files:
             bg_files = None  # fallback to solid bg
 
-    for i, txt in enumerate(tqdm(chunks, desc="Generating Images")):
-        out = os.path.join(image_dir, f"img_{i}.png")
+    render_kwargs = dict(
+        size=size,
+        font_size=font_size,
+        font_color=font_color,
+        box_color=box_color,
+        box_alpha=box_alpha,
+        text_position=text_position,
+        enable_shadow=enable_shadow,
+        shadow_color=shadow_color,
+        shadow_offset_x=shadow_offset_x,
+        shadow_offset_y=shadow_offset_y,
+    )
 
+    # Build one work item per chunk; the random background pick stays in the parent.
+    # Plain-text chunks get their text from ffmpeg drawtext when the build has it,
+    # so they only need a background frame (shared between slides with the same bg).
+    work = []
+    overlays = []
+    bg_frames = {}
+    for i, txt in enumerate(chunks):
         if bg_files:
             chosen_bg = random.choice(bg_files)
         else:
             chosen_bg = bg_img
 
-        render_text_image(
-            txt,
-            out,
-            font_path,
-            size=size,
-            bg_path=chosen_bg,
-            font_size=font_size,
-            font_color=font_color,
-            box_color=box_color,
-            box_alpha=box_alpha,
-            text_position=text_position,
-            enable_shadow=enable_shadow,
-            shadow_color=shadow_color,
-            shadow_offset_x=shadow_offset_x,
-            shadow_offset_y=shadow_offset_y,
-        )
+        overlay = None
+        if not contains_complex_script(txt) and _ffmpeg_has_filter("drawtext"):
+            overlay = simple_text_overlay(txt, font_path, **render_kwargs)
+
+        if overlay is not None:
+            out = bg_frames.get(chosen_bg)
+            if out is None:
+                out = os.path.join(image_dir, f"bg_{len(bg_frames)}.jpg")
+                bg_frames[chosen_bg] = out
+                work.append((None, out, font_path, dict(render_kwargs, bg_path=chosen_bg)))
+        else:
+            out = os.path.join(image_dir, f"img_{i}.jpg")
+            work.append((txt, out, font_path, dict(render_kwargs, bg_path=chosen_bg)))
         paths.append(out)
-    return paths
+        overlays.append(overlay)
+
+    if not work:
+        return paths, overlays
+
+    workers = max(1, min(os.cpu_count() or 1, len(work)))
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(font_path, font_size),
+    ) as ex:
+        list(tqdm(ex.map(_render_one, work), total=len(work), desc="Generating Images"))
+    return paths, overlays
+
+
+def _run_ffmpeg(args, cwd=None):
+    subprocess.run(
+        [FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", "-y", *args],
+        check=True,
+        cwd=cwd,
+    )
+
+
+@lru_cache(maxsize=None)
+def _ffmpeg_has_filter(name):
+    """Static ffmpeg builds don't always ship drawtext (it needs libfreetype)."""
+    try:
+        out = subprocess.run(
+            [FFMPEG_BINARY, "-hide_banner", "-filters"],
+            capture_output=True,
+            text=True,
+        ).stdout
+    except OSError:
+        return False
+    return any(line.split()[1:2] == [name] for line in out.splitlines())
+
+
+def _ffmpeg_color(rgb):
+    return "0x%02X%02X%02X" % rgb
+
+
+def _enable_window(start, end):
+    return f"enable='gte(t,{start:.3f})*lt(t,{end:.3f})'"
+
+
+def _concat_entry(path):
+    """Quote a path for an ffmpeg concat demuxer list."""
+    return "file '" + os.path.abspath(path).replace("'", "'\\''") + "'\n"
+
+
+def _write_silence(path, seconds, params):
+    """Write a silent WAV matching params, for padding slides up to --min-duration."""
+    nframes = int(round(seconds * params.framerate))
+    with wave.open(path, "wb") as w:
+        w.setnchannels(params.nchannels)
+        w.setsampwidth(params.sampwidth)
+        w.setframerate(params.framerate)
+        w.writeframes(b"\0" * (nframes * params.nchannels * params.sampwidth))
+
+
+def _logo_filter(logo_input, size, logo_position, logo_opacity):
+    """Scale the logo to ~20% of the width and overlay it with a 20px margin."""
+    target_w = int(size[0] * 0.2)
+    opacity = max(0.0, min(1.0, logo_opacity))
+
+    if "left" in logo_position:
+        x = "20"
+    elif "right" in logo_position:
+        x = "W-w-20"
+    else:
+        x = "(W-w)/2"
+    y = "H-h-20" if "bottom" in logo_position else "20"
+
+    return [
+        f"[{logo_input}:v]scale={target_w}:-1,format=rgba,colorchannelmixer=aa={opacity}[logo]",
+        f"[vp][logo]overlay=x={x}:y={y}:shortest=1[vl]",
+    ]
+
+
+def _text_filter(text_overlays, durations, workdir):
+    """drawbox + drawtext for each plain-text slide, active only during that slide.
+
+    Fonts and line texts are written into workdir and referenced by bare file
+    name (ffmpeg runs there), which sidesteps filtergraph escaping entirely.
+    """
+    fonts = {}
+    filters = []
+    start = 0.0
+    for i, (spec, dur) in enumerate(zip(text_overlays, durations)):
+        if spec is not None:
+            enable = _enable_window(start, start + dur)
+
+            font_file = fonts.get(spec["font_path"])
+            if font_file is None:
+                font_file = f"font_{len(fonts)}{os.path.splitext(spec['font_path'])[1]}"
+                shutil.copyfile(spec["font_path"], os.path.join(workdir, font_file))
+                fonts[spec["font_path"]] = font_file
+
+            x0, y0, x1, y1 = spec["box"]
+            filters.append(
+                f"drawbox=x={x0}:y={y0}:w={x1 - x0 + 1}:h={y1 - y0 + 1}"
+                f":color={_ffmpeg_color(spec['box_rgb'])}@{spec['box_alpha']:.3f}:t=fill:{enable}"
+            )
+
+            for j, (line, y) in enumerate(spec["lines"]):
+                text_file = f"text_{i}_{j}.txt"
+                with open(os.path.join(workdir, text_file), "w", encoding="utf-8") as f:
+                    f.write(line)
+
+                draw = (
+                    f"drawtext=fontfile={font_file}:textfile={text_file}:expansion=none"
+                    f":fontsize={spec['font_size']}:fontcolor={_ffmpeg_color(spec['font_rgb'])}"
+                    # drawtext's y is the top of the line's own tallest glyph; anchor
+                    # the baseline at the font ascent instead, as Pillow does
+                    f":x=(w-text_w)/2:y={y + spec['ascent']}-max_glyph_a"
+                )
+                if spec["shadow"]:
+                    shadow_rgb, dx, dy = spec["shadow"]
+                    draw += f":shadowcolor={_ffmpeg_color(shadow_rgb)}:shadowx={dx}:shadowy={dy}"
+                filters.append(f"{draw}:{enable}")
+        start += dur
+    return ",".join(filters)
+
+
+def _progress_filter(durations, progress_color, progress_height):
+    """One drawbox per slide, each enabled only during that slide (jumps per slide)."""
+    bar_hex = _ffmpeg_color(_getrgb(progress_color))
+    total_slides = len(durations)
+    boxes = [f"drawbox=x=0:y=ih-{progress_height}:w=iw:h={progress_height}:color=0x1E1E1E:t=fill"]
+    start = 0.0
+    for idx, dur in enumerate(durations):
+        fraction = float(idx + 1) / total_slides
+        boxes.append(
+            f"drawbox=x=0:y=ih-{progress_height}:w=iw*{fraction:.6f}:h={progress_height}"
+            f":color={bar_hex}:t=fill:{_enable_window(start, start + dur)}"
+        )
+        start += dur
+    return ",".join(boxes)
 
 
 def assemble_video(
@@ -333,100 +748,138 @@ def assemble_video(
     enable_progress_bar=False,
     progress_color="#FFFFFF",
     progress_height=6,
+    text_overlays=None,
 ):
-    clips = []
-    durations = []
-
-    for i, img in enumerate(tqdm(images, desc="Making Clips")):
-        audio = AudioFileClip(os.path.join(audio_dir, f"chunk_{i}.mp3"))
-        duration = audio.duration
-        if min_duration > 0 and duration < min_duration:
-            duration = min_duration
-            audio = audio.set_duration(duration)
-
-        img_clip = ImageClip(img).set_duration(duration).set_audio(audio)
-        img_clip = img_clip.resize(size)
-        clips.append(img_clip)
-        durations.append(duration)
-
-    final = concatenate_videoclips(clips, method="compose")
-
-    # Background music
-    if bg_music and os.path.exists(bg_music):
-        music = AudioFileClip(bg_music).volumex(0.1)
-        music = audio_loop(music, duration=final.duration)
-        final = final.set_audio(CompositeAudioClip([final.audio, music]))
-
-    # Logo overlay
-    if logo_path and os.path.exists(logo_path):
-        try:
-            logo_clip = ImageClip(logo_path)
-            target_w = size[0] * 0.2  # ~20% of width
-            logo_clip = logo_clip.resize(width=target_w).set_opacity(
-                max(0.0, min(1.0, logo_opacity))
-            )
-
-            pos_map = {
-                "top-left": ("left", "top"),
-                "top-right": ("right", "top"),
-                "bottom-left": ("left", "bottom"),
-                "bottom-right": ("right", "bottom"),
-                "top-center": ("center", "top"),
-                "bottom-center": ("center", "bottom"),
-            }
-            pos = pos_map.get(logo_position, ("center", "top"))
-            # margin
-            if "bottom" in logo_position:
-                logo_clip = logo_clip.margin(bottom=20, opacity=0)
-            else:
-                logo_clip = logo_clip.margin(top=20, opacity=0)
-            if "left" in logo_position:
-                logo_clip = logo_clip.margin(left=20, opacity=0)
-            elif "right" in logo_position:
-                logo_clip = logo_clip.margin(right=20, opacity=0)
-
-            logo_clip = logo_clip.set_duration(final.duration).set_position(pos)
-            final = CompositeVideoClip([final, logo_clip])
-        except Exception as e:
-            print(f"[WARN] Could not overlay logo: {e}")
-
-    # Progress bar overlay (simple: jumps per slide)
-    if enable_progress_bar and durations:
-        try:
-            bar_rgb = ImageColor.getrgb(progress_color)
-            total_slides = len(durations)
-
-            new_clips = []
-            for idx, base_clip in enumerate(clips):
-                dur = durations[idx]
-                progress_fraction = float(idx + 1) / total_slides
-                bar_width = int(size[0] * progress_fraction)
-
-                bar_bg = ColorClip(
-                    size=(size[0], progress_height),
-                    color=(30, 30, 30),
-                ).set_duration(dur).set_position(("center", "bottom"))
-
-                bar_fg = ColorClip(
-                    size=(bar_width, progress_height),
-                    color=bar_rgb,
-                ).set_duration(dur).set_position(("left", "bottom"))
+    """Mux static slides, narration and overlays with a single ffmpeg process."""
+    with tempfile.TemporaryDirectory(prefix="slides_") as tmp:
+        video_list = os.path.join(tmp, "video_concat.txt")
+        audio_list = os.path.join(tmp, "audio_concat.txt")
+        durations = []
+
+        with open(video_list, "w", encoding="utf-8") as vf, open(audio_list, "w", encoding="utf-8") as af:
+            for i, img in enumerate(tqdm(images, desc="Preparing Slides")):
+                wav_path = os.path.join(audio_dir, f"chunk_{i}.wav")
+                # Exact length from the WAV header
+                with wave.open(wav_path, "rb") as w:
+                    params = w.getparams()
+                duration = params.nframes / params.framerate
+                af.write(_concat_entry(wav_path))
+
+                if min_duration > 0 and duration < min_duration:
+                    pad_path = os.path.join(tmp, f"pad_{i}.wav")
+                    _write_silence(pad_path, min_duration - duration, params)
+                    af.write(_concat_entry(pad_path))
+                    duration = min_duration
+
+                vf.write(_concat_entry(img))
+                vf.write(f"duration {duration:.3f}\n")
+                durations.append(duration)
+
+            # The concat demuxer ignores the last duration unless the file is repeated
+            if images:
+                vf.write(_concat_entry(images[-1]))
+
+        total = sum(durations)
+        inputs = [
+            "-f", "concat", "-safe", "0", "-i", video_list,
+            "-f", "concat", "-safe", "0", "-i", audio_list,
+        ]
+        next_input = 2
+        w, h = size
+        graph = [f"[0:v]scale={w}:{h},setsar=1,fps=24"]
+        # A bare stream specifier: bracketed -map targets must be filtergraph outputs
+        audio_label = "1:a"
+
+        # Plain-text slides: their text is drawn here rather than baked into the frame.
+        # Blend in RGB so the translucent box tints the background like the Pillow path.
+        if text_overlays and any(text_overlays):
+            graph[0] += ",format=rgb24," + _text_filter(text_overlays, durations, tmp)
+        graph[0] += ",format=yuv420p"
+
+        # Background music, looped under the narration at 10% volume
+        if bg_music and os.path.exists(bg_music):
+            inputs += ["-stream_loop", "-1", "-i", os.path.abspath(bg_music)]
+            graph.append(f"[1:a][{next_input}:a]amix=inputs=2:duration=first:weights='1 0.1':normalize=0[a]")
+            audio_label = "[a]"
+            next_input += 1
+
+        # Progress bar overlay (simple: jumps per slide)
+        if enable_progress_bar and durations:
+            try:
+                graph[0] += "," + _progress_filter(durations, progress_color, progress_height)
+            except Exception as e:
+                print(f"[WARN] Could not draw progress bar: {e}")
+        graph[0] += "[vp]"
+        video_label = "[vp]"
+
+        # Logo overlay
+        if logo_path and os.path.exists(logo_path):
+            try:
+                with Image.open(logo_path) as logo:
+                    logo.verify()
+                inputs += ["-loop", "1", "-i", os.path.abspath(logo_path)]
+                graph += _logo_filter(next_input, size, logo_position, logo_opacity)
+                video_label = "[vl]"
+                next_input += 1
+            except Exception as e:
+                print(f"[WARN] Could not overlay logo: {e}")
+
+        graph.append(
+            f"{video_label}fade=t=in:st=0:d=1,fade=t=out:st={max(total - 1, 0):.3f}:d=1[v]"
+        )
 
-                comp = CompositeVideoClip([base_clip, bar_bg, bar_fg])
-                new_clips.append(comp)
+        # Via a file: one drawbox/drawtext per plain-text line quickly outgrows
+        # the kernel's 128 KiB limit on a single argv string
+        graph_script = os.path.join(tmp, "filter_complex.txt")
+        with open(graph_script, "w", encoding="utf-8") as gf:
+            gf.write(";".join(graph))
+
+        _run_ffmpeg(
+            inputs
+            + [
+                "-filter_complex_script", graph_script,
+                "-map", "[v]",
+                "-map", audio_label,
+                "-c:v", "libx264",
+                "-preset", "veryfast",
+                "-tune", "stillimage",
+                "-pix_fmt", "yuv420p",
+                "-r", "24",
+                "-c:a", "aac",
+                "-shortest",
+                os.path.abspath(output_path),
+            ],
+            cwd=tmp,
+        )
 
-            final = concatenate_videoclips(new_clips, method="compose")
-        except Exception as e:
-            print(f"[WARN] Could not draw progress bar: {e}")
 
-    final = final.fadein(1).fadeout(1)
-    final.write_videofile(output_path, fps=24, codec="libx264", audio_codec="aac")
+def read_chunks(path):
+    """Return the review's non-blank lines, stripped, one per chunk."""
+    chunks = []
+    with open(path, "rb") as f:
+        # mmap refuses empty files
+        if os.fstat(f.fileno()).st_size == 0:
+            return chunks
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # Walk the mapping line by line; only each line is copied out, never the whole file
+            pos, end = 0, len(mm)
+            while pos < end:
+                nl = mm.find(b"\n", pos)
+                if nl == -1:
+                    nl = end
+                line = mm[pos:nl].decode("utf-8").strip()  # strip() also drops a CRLF's \r
+                if line:
+                    chunks.append(line)
+                pos = nl + 1
+    return chunks
 
 
 def main():
     args = parse_args()
-    with open(args.input, encoding="utf-8") as f:
-        chunks = [line.strip() for line in f if line.strip()]
+    # Pillow-SIMD releases carry a ".postN" suffix; stock Pillow works, just slower
+    if ".post" not in PIL_VERSION:
+        print(f"[INFO] Using stock Pillow {PIL_VERSION}; install pillow-simd for faster resizing.")
+    chunks = read_chunks(args.input)
 
     print(f"[INFO] Generating TTS for {len(chunks)} chunks...")
     asyncio.run(generate_all_audios(chunks, args.voice, args.rate, "audio_chunks"))
@@ -451,7 +904,7 @@ def main():
         font_color = "#FFFFFF"
 
     print("[INFO] Rendering images...")
-    images = generate_images(
+    images, text_overlays = generate_images(
         chunks,
         args.font,
         "images",
@@ -482,6 +935,7 @@ def main():
         enable_progress_bar=args.enable_progress_bar,
         progress_color=args.progress_color,
         progress_height=args.progress_height,
+        text_overlays=text_overlays,
     )
     print("[DONE] Video saved at:", args.output)
 